@@ -91,7 +91,9 @@ def auth_page(browser_context: BrowserContext, request) -> Page:
 @pytest.fixture(scope="function")
 def response_validator():
     """Create response validator instance"""
-    return ResponseValidatorDeepseek(config)
+    validator = ResponseValidatorDeepseek(config)
+    yield validator
+    validator.shutdown()
 
 @pytest.fixture(scope="function")
 def response_storage():
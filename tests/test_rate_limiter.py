@@ -0,0 +1,169 @@
+import asyncio
+import pytest
+from utils import rate_limiter
+from utils.rate_limiter import ApiKeyScheduler, RateLimiter
+
+class FakeClock:
+    """Monotonic clock that only moves when the code under test sleeps"""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drive the limiter's time and sleeps from a fake clock"""
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", clock.sleep)
+    return clock
+
+def test_full_bucket_does_not_wait(clock):
+    """A fresh limiter hands out its whole request budget immediately"""
+    limiter = RateLimiter(requests_per_minute=5, tokens_per_minute=1000)
+
+    async def run():
+        for _ in range(5):
+            await limiter.acquire(100)
+
+    asyncio.run(run())
+
+    assert clock.sleeps == []
+    assert limiter.available_request_capacity == pytest.approx(0)
+    assert limiter.available_token_capacity == pytest.approx(500)
+
+def test_empty_request_bucket_waits_one_refill_interval(clock):
+    """With no requests left, acquire sleeps exactly until one request has refilled"""
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=100000)
+    limiter.available_request_capacity = 0
+
+    asyncio.run(limiter.acquire())
+
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+def test_token_bucket_waits_for_missing_tokens(clock):
+    """A request larger than the remaining tokens waits for the shortfall to refill"""
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60)
+
+    async def run():
+        await limiter.acquire(60)
+        await limiter.acquire(30)
+
+    asyncio.run(run())
+
+    assert clock.sleeps == [pytest.approx(30.0)]
+
+def test_oversized_request_is_clipped_to_bucket(clock):
+    """A request bigger than the whole token bucket waits for a full bucket, not forever"""
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60)
+
+    asyncio.run(limiter.acquire(10000))
+
+    assert clock.sleeps == []
+    assert limiter.available_token_capacity == pytest.approx(0)
+
+def test_replenish_is_capped_at_capacity(clock):
+    """Idle time never refills a bucket past its per-minute limit"""
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=100)
+    limiter.available_request_capacity = 2
+    clock.now += 3600
+
+    limiter._replenish()
+
+    assert limiter.available_request_capacity == 10
+    assert limiter.available_token_capacity == 100
+
+def test_headers_lower_capacity_but_never_raise_it(clock):
+    """Remaining-quota headers only ever shrink the local buckets"""
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000)
+
+    limiter.update_from_headers({"x-ratelimit-remaining-requests": "3", "x-ratelimit-remaining-tokens": "5000"})
+
+    assert limiter.available_request_capacity == 3
+    assert limiter.available_token_capacity == 1000
+
+def test_retry_after_pauses_acquire(clock):
+    """Retry-After holds back every acquire until the pause has passed"""
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000)
+
+    assert limiter.update_from_headers({"retry-after": "12"}) == 12.0
+    asyncio.run(limiter.acquire())
+
+    assert clock.sleeps == [pytest.approx(12.0)]
+
+def test_malformed_headers_are_ignored(clock):
+    """Unparseable header values leave the limiter untouched"""
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000)
+
+    assert limiter.update_from_headers({"x-ratelimit-remaining-requests": "n/a", "retry-after": "soon"}) is None
+    assert limiter.available_request_capacity == 10
+    assert limiter.paused_until == 0.0
+
+def test_pause_never_shortens_an_existing_pause(clock):
+    """A shorter pause does not cut a longer one short"""
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000)
+
+    limiter.pause(30)
+    limiter.pause(5)
+
+    assert limiter.paused_until == clock.now + 30
+
+def test_retry_after_pause_is_capped(clock):
+    """A quota-style Retry-After holds the limiter for at most max_pause seconds"""
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000, max_pause=30)
+
+    assert limiter.update_from_headers({"retry-after": "7200"}) == 7200.0
+    asyncio.run(limiter.acquire())
+
+    assert clock.sleeps == [pytest.approx(30.0)]
+
+def test_scheduler_prefers_key_with_most_capacity(clock):
+    """The key with the most remaining requests is chosen"""
+    scheduler = ApiKeyScheduler(["a", "b", "c"], requests_per_minute=10, tokens_per_minute=1000)
+    scheduler._keys[0]["limiter"].available_request_capacity = 2
+    scheduler._keys[2]["limiter"].available_request_capacity = 5
+
+    entry = asyncio.run(scheduler.acquire())
+
+    assert entry["key"] == "b"
+
+def test_scheduler_skips_throttled_key(clock):
+    """A throttled key is passed over while another key is available"""
+    scheduler = ApiKeyScheduler(["a", "b"], requests_per_minute=10, tokens_per_minute=1000)
+    scheduler.throttle(scheduler._keys[0], 60)
+
+    entry = asyncio.run(scheduler.acquire())
+
+    assert entry["key"] == "b"
+    assert clock.sleeps == []
+
+def test_scheduler_breaks_ties_by_least_recent_use(clock):
+    """Keys with equal quota rotate, least recently used first"""
+    scheduler = ApiKeyScheduler(["a", "b"], requests_per_minute=10, tokens_per_minute=1000)
+
+    async def run():
+        chosen = []
+        for _ in range(4):
+            entry = await scheduler.acquire()
+            chosen.append(entry["key"])
+            clock.now += 60  # let both keys refill so only recency differs
+        return chosen
+
+    assert asyncio.run(run()) == ["a", "b", "a", "b"]
+
+def test_scheduler_waits_for_soonest_key_when_all_are_throttled(clock):
+    """When every key is paused, the one that resumes first is used"""
+    scheduler = ApiKeyScheduler(["a", "b"], requests_per_minute=10, tokens_per_minute=1000)
+    scheduler.throttle(scheduler._keys[0], 20)
+    scheduler.throttle(scheduler._keys[1], 5)
+
+    entry = asyncio.run(scheduler.acquire())
+
+    assert entry["key"] == "b"
+    assert clock.sleeps == [pytest.approx(5.0)]
@@ -0,0 +1,51 @@
+import json
+import pytest
+from utils.response_checks import check_completeness, check_formatting, check_hallucination
+from utils.response_validator import ResponseValidator
+from utils.response_validator_deepseek import ResponseValidatorDeepseek
+
+# Load configuration
+with open("config/config.json") as f:
+    config = json.load(f)
+
+# Load test data
+with open("data/test-data.json") as f:
+    test_data = json.load(f)
+
+TEST_CASE = test_data["test_cases"][0]
+
+@pytest.mark.parametrize("response, expected", [
+    ("Hello, welcome to the UAE.", 1.0),
+    ("hello, welcome to the UAE.", 0.5),
+    ("مرحباً، من هو رئيس وزراء الإمارات؟", 1.0),
+    ("مرحباً بكم في الإمارات", 0.5),
+    ("", 0.0)
+])
+def test_formatting_handles_caseless_scripts(response, expected):
+    """Arabic has no capitals to check and ends sentences with its own punctuation"""
+    assert check_formatting(response) == expected
+
+def test_hallucination_coverage():
+    """Hallucination coverage is the share of expected phrases present, case-insensitively"""
+    assert check_hallucination("the prime minister is in DUBAI", ["Dubai", "Prime Minister", "1971"]) == pytest.approx(2 / 3)
+    assert check_hallucination("anything", []) == 1.0
+
+def test_completeness_scores_length_and_keywords():
+    """Completeness gives 0.4 for the length bounds and 0.6 for required keyword coverage"""
+    criteria = {"min_length": 10, "max_length": 40, "required_keywords": ["UAE", "Dubai"]}
+
+    assert check_completeness("Dubai is in the UAE.", criteria) == pytest.approx(1.0)
+    assert check_completeness("Dubai.", criteria) == pytest.approx(0.3)
+    assert check_completeness("A response with no keywords.", {}) == pytest.approx(1.0)
+
+@pytest.mark.parametrize("language, response", [
+    ("en", "Hello! His Highness Sheikh Mohammed bin Rashid Al Maktoum is the Prime Minister of the UAE."),
+    ("ar", "مرحباً، صاحب السمو الشيخ محمد بن راشد آل مكتوم هو نائب رئيس الدولة ورئيس الوزراء وحاكم دبي؟")
+])
+def test_both_validators_score_local_aspects_alike(language, response):
+    """The rule-based and Deepseek validators share the same local scoring for every language"""
+    rule_based = ResponseValidator(config).validate_response(response, language, TEST_CASE)
+    deepseek = ResponseValidatorDeepseek(config)._build_validation_results({}, response, language, TEST_CASE)
+
+    assert rule_based["formatting"] == deepseek["formatting"]
+    assert rule_based["completeness"] == deepseek["completeness"]
@@ -0,0 +1,547 @@
+import aiohttp
+import asyncio
+import json
+import pytest
+import redis
+import threading
+import time
+from loguru import logger
+from utils import rate_limiter, response_validator_deepseek
+from utils.response_validator_deepseek import ResponseValidatorDeepseek
+
+# Load configuration
+with open("config/config.json") as f:
+    config = json.load(f)
+
+# Load test data
+with open("data/test-data.json") as f:
+    test_data = json.load(f)
+
+TEST_CASE = test_data["test_cases"][0]
+
+SUBJECTIVE_ANALYSIS = {
+    "clarity": {"score": 0.9},
+    "hallucination": {"score": 1.0},
+    "language_specific": {"score": 0.8},
+    "api_log": {"request": {}}
+}
+
+class FakeRedis:
+    """In-memory stand-in for the Redis cache tier"""
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    async def aclose(self):
+        pass
+
+class UnreachableRedis:
+    """Redis stand-in whose every call fails like a host that cannot be reached"""
+    def __init__(self):
+        self.attempts = 0
+
+    async def get(self, key):
+        self.attempts += 1
+        raise redis.ConnectionError("Timeout connecting to server")
+
+    async def setex(self, key, ttl, value):
+        self.attempts += 1
+        raise redis.ConnectionError("Timeout connecting to server")
+
+    async def aclose(self):
+        pass
+
+class FakeResponse:
+    """Canned aiohttp response usable as an async context manager"""
+    def __init__(self, status, headers=None, body=None):
+        self.status = status
+        self.headers = headers or {}
+        self.body = json.dumps(body or {}).encode()
+
+    async def read(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+class FakeSession:
+    """Stand-in for the pooled aiohttp session that replays canned responses in order"""
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.posts = 0
+
+    def post(self, url, **kwargs):
+        self.posts += 1
+        outcome = self.responses.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+def completion(content, finish_reason="stop"):
+    """Build a chat completion body whose first choice carries the given content"""
+    return {"choices": [{"message": {"content": content}, "finish_reason": finish_reason}]}
+
+PAYLOAD = {"messages": [{"role": "user", "content": "Score this"}], "max_tokens": 16}
+
+@pytest.fixture(scope="function")
+def validator():
+    """Create a validator whose cache and Deepseek requests never leave the process"""
+    validator = ResponseValidatorDeepseek(config)
+    validator.redis = FakeRedis()
+    validator.calls = []
+    validator.loops = []
+
+    async def request_analysis(validation_prompt, cache_key):
+        validator.calls.append(cache_key)
+        validator.loops.append(asyncio.get_running_loop())
+        await asyncio.sleep(0.01)
+        return dict(SUBJECTIVE_ANALYSIS)
+
+    validator._request_analysis_async = request_analysis
+    yield validator
+    validator.shutdown()
+
+def test_sync_wrapper_inside_running_loop(validator):
+    """Sync wrappers must work while the calling thread already runs a loop, as under sync_playwright"""
+    async def caller():
+        return validator.validate_response("Hello from Dubai.", "en", TEST_CASE)
+
+    results = asyncio.run(caller())
+
+    assert results["clarity"]["score"] == 0.9
+    assert results["language_specific"]["score"] == 0.8
+    assert len(validator.calls) == 1
+
+def test_sync_wrapper_reuses_worker_loop(validator):
+    """Repeated sync calls share one worker loop until shutdown"""
+    validator.validate_response("Hello from Dubai.", "en", TEST_CASE)
+    loop = validator._loop
+    validator.validate_response("Hello from Abu Dhabi.", "en", TEST_CASE)
+
+    assert validator._loop is loop
+    validator.shutdown()
+    assert validator._loop is None
+
+def test_async_callers_share_worker_loop(validator):
+    """Async calls from other loops run on the worker loop, so the session is never rebuilt per loop"""
+    asyncio.run(validator.validate_response_async("Hello from Dubai.", "en", TEST_CASE))
+    validator.validate_response("Hello from Sharjah.", "en", TEST_CASE)
+    asyncio.run(validator.validate_response_async("Hello from Ajman.", "en", TEST_CASE))
+
+    assert len(validator.loops) == 3
+    assert all(loop is validator._loop for loop in validator.loops)
+
+def test_redis_failure_skips_redis_tier(validator):
+    """One Redis failure takes the tier out of use instead of failing every lookup again"""
+    validator.redis = UnreachableRedis()
+
+    validator.validate_response("Hello from Dubai.", "en", TEST_CASE)
+    validator.validate_response("Hello from Fujairah.", "en", TEST_CASE)
+
+    assert validator.redis.attempts == 1
+    assert len(validator.calls) == 2
+
+def test_validate_many_isolates_bad_rows(validator):
+    """A malformed row falls back to default scores without losing the other rows' results"""
+    broken_case = {"id": "TC999", "queries": {"en": {"validation": {}}}}
+
+    results = validator.validate_many([
+        ("Hello from Dubai.", "en", TEST_CASE),
+        ("Hello from nowhere.", "en", broken_case)
+    ])
+
+    assert results[0]["clarity"]["score"] == 0.9
+    assert results[1] == {
+        "clarity": {"score": 0.4},
+        "hallucination": {"score": 0.5},
+        "formatting": {"score": 0.5},
+        "completeness": {"score": 0.7},
+        "language_specific": {"score": 0.3}
+    }
+
+def test_tokenizer_loads_lazily_once(validator, monkeypatch):
+    """The tokenizer is not loaded at construction, and a failed load is not retried"""
+    attempts = []
+
+    def encoding_for_model(model):
+        attempts.append(model)
+        raise OSError("offline")
+
+    monkeypatch.setattr(response_validator_deepseek.tiktoken, "encoding_for_model", encoding_for_model)
+    fresh = ResponseValidatorDeepseek(config)
+    assert attempts == []
+
+    assert fresh._tokens("abcdefgh") == 2
+    fresh._enc_thread.join(5)
+    assert fresh._tokens("abcdefghijkl") == 3
+    assert len(attempts) == 1
+
+def test_tokenizer_loads_off_the_calling_thread(validator, monkeypatch):
+    """A slow tokenizer download never blocks estimates; they use length until it is ready"""
+    release = threading.Event()
+
+    class WordEncoder:
+        def encode_ordinary(self, text):
+            return text.split()
+
+    def encoding_for_model(model):
+        release.wait(5)
+        return WordEncoder()
+
+    monkeypatch.setattr(response_validator_deepseek.tiktoken, "encoding_for_model", encoding_for_model)
+    fresh = ResponseValidatorDeepseek(config)
+
+    assert fresh._tokens("one two three four five six seven eight") == 9
+    release.set()
+    fresh._enc_thread.join(5)
+    assert fresh._tokens("one two three four five six seven eight") == 8
+
+def test_hallucination_blends_local_and_subjective_scores(validator):
+    """Hallucination averages expected-content coverage with Deepseek's false-information judgement"""
+    # One of the three expected phrases is present; the stubbed analysis scores hallucination 1.0
+    results = validator.validate_response("The Prime Minister leads the cabinet.", "en", TEST_CASE)
+
+    assert results["hallucination"]["score"] == pytest.approx((1 / 3 + 1.0) / 2)
+
+def test_identical_concurrent_requests_share_one_call(validator):
+    """Concurrent callers with the same cache key wait on a single Deepseek request"""
+    async def run():
+        return await asyncio.gather(*(validator._get_deepseek_analysis_async("prompt", "key") for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert validator.calls == ["key"]
+    assert all(result is results[0] for result in results)
+    assert validator._inflight == {}
+
+def test_cancelled_joiner_leaves_owner_running(validator):
+    """Cancelling a caller that joined an in-flight request does not cancel the request"""
+    async def run():
+        owner = asyncio.ensure_future(validator._get_deepseek_analysis_async("prompt", "key"))
+        await asyncio.sleep(0)
+        joiner = asyncio.ensure_future(validator._get_deepseek_analysis_async("prompt", "key"))
+        await asyncio.sleep(0)
+        joiner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await joiner
+        return await owner
+
+    assert asyncio.run(run())["clarity"]["score"] == 0.9
+    assert validator.calls == ["key"]
+
+def test_joiner_takes_over_when_owner_is_cancelled(validator):
+    """Callers waiting on a cancelled owner issue the request themselves, once between them"""
+    async def run():
+        owner = asyncio.ensure_future(validator._get_deepseek_analysis_async("prompt", "key"))
+        await asyncio.sleep(0)
+        joiners = [asyncio.ensure_future(validator._get_deepseek_analysis_async("prompt", "key")) for _ in range(3)]
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await asyncio.gather(*joiners)
+
+    results = asyncio.run(run())
+
+    assert all(result["clarity"]["score"] == 0.9 for result in results)
+    assert validator.calls == ["key", "key"]
+    assert validator._inflight == {}
+
+def test_batched_rows_join_single_in_flight_request(validator):
+    """A batched row identical to an in-flight single validation reuses its result"""
+    batched_rows = []
+
+    async def batched_analysis(rows):
+        batched_rows.extend(rows)
+        return [dict(SUBJECTIVE_ANALYSIS) for _ in rows]
+
+    validator._get_batched_analysis_async = batched_analysis
+
+    async def run():
+        single = asyncio.ensure_future(validator._validate_response("Hello from Dubai.", "en", TEST_CASE))
+        await asyncio.sleep(0)
+        batch = await validator._validate_responses([
+            ("Hello from Dubai.", "en", TEST_CASE),
+            ("Hello from Al Ain.", "en", TEST_CASE)
+        ])
+        return await single, batch
+
+    single, batch = asyncio.run(run())
+
+    assert len(validator.calls) == 1
+    assert [row[0] for row in batched_rows] == ["Hello from Al Ain."]
+    assert batch[0] == single
+
+def test_batched_row_revalidates_when_owner_is_cancelled(validator):
+    """A batched row that joined a cancelled single validation validates itself instead"""
+    async def batched_analysis(rows):
+        return [dict(SUBJECTIVE_ANALYSIS) for _ in rows]
+
+    validator._get_batched_analysis_async = batched_analysis
+
+    async def run():
+        single = asyncio.ensure_future(validator._validate_response("Hello from Dubai.", "en", TEST_CASE))
+        await asyncio.sleep(0)
+        batch = asyncio.ensure_future(validator._validate_responses([("Hello from Dubai.", "en", TEST_CASE)]))
+        await asyncio.sleep(0)
+        single.cancel()
+        return await batch
+
+    batch = asyncio.run(run())
+
+    assert batch[0]["clarity"]["score"] == 0.9
+    assert len(validator.calls) == 2
+
+def test_compare_reuses_precomputed_scores(validator):
+    """Given both languages' validation results, the comparison is the only Deepseek request"""
+    en_scores = validator.validate_response("Hello from Dubai.", "en", TEST_CASE)
+    ar_scores = validator.validate_response("مرحباً من دبي.", "ar", TEST_CASE)
+    validator.calls.clear()
+
+    results = validator.compare_responses("Hello from Dubai.", "مرحباً من دبي.", TEST_CASE, en_scores, ar_scores)
+
+    assert len(validator.calls) == 1
+    assert set(results) == {"semantic_similarity", "information_consistency", "structure_similarity"}
+
+def test_compare_fresh_responses_costs_one_request(validator):
+    """Responses never validated before are compared in a single request, without their scores"""
+    prompts = []
+
+    async def request_analysis(validation_prompt, cache_key):
+        prompts.append(validation_prompt)
+        return dict(SUBJECTIVE_ANALYSIS)
+
+    validator._request_analysis_async = request_analysis
+
+    validator.compare_responses("Hello from Dubai.", "مرحباً من دبي.", TEST_CASE)
+
+    assert len(prompts) == 1
+    assert "English validation scores: not available" in prompts[0]
+
+def test_compare_uses_cached_validations(validator):
+    """Validation results already in the cache feed the comparison prompt for free"""
+    prompts = []
+
+    async def request_analysis(validation_prompt, cache_key):
+        prompts.append(validation_prompt)
+        results = dict(SUBJECTIVE_ANALYSIS)
+        await validator._store_cached_analysis(cache_key, results)
+        return results
+
+    validator._request_analysis_async = request_analysis
+    validator.validate_response("Hello from Dubai.", "en", TEST_CASE)
+    prompts.clear()
+
+    validator.compare_responses("Hello from Dubai.", "مرحباً من دبي.", TEST_CASE)
+
+    assert len(prompts) == 1
+    assert "English validation scores: clarity=0.90" in prompts[0]
+    assert "Arabic validation scores: not available" in prompts[0]
+
+def test_comparison_cache_key_tracks_excerpt_length(validator):
+    """Changing comparison_excerpt_chars changes the prompt, so it must not hit the old cache entry"""
+    scores = validator.validate_response("Hello from Dubai.", "en", TEST_CASE)
+    validator.compare_responses("Hello from Dubai.", "مرحباً من دبي.", TEST_CASE, scores, scores)
+    validator.comparison_excerpt_chars = 5
+    validator.compare_responses("Hello from Dubai.", "مرحباً من دبي.", TEST_CASE, scores, scores)
+
+    assert len(set(validator.calls)) == 3
+
+def test_malformed_batch_row_leaves_no_dangling_futures(validator):
+    """A batch that fails on a malformed row must not strand the other rows' in-flight futures"""
+    broken_case = {"id": "TC999", "queries": {}}
+
+    with pytest.raises(KeyError):
+        validator.validate_responses([
+            ("Hello from Dubai.", "en", TEST_CASE),
+            ("Hello from nowhere.", "en", broken_case)
+        ])
+    assert validator._inflight == {}
+
+    async def revalidate():
+        return await asyncio.wait_for(validator.validate_response_async("Hello from Dubai.", "en", TEST_CASE), 5)
+
+    assert asyncio.run(revalidate())["clarity"]["score"] == 0.9
+
+@pytest.fixture
+def http(validator, monkeypatch):
+    """Route the validator's HTTP posts through a FakeSession and record sleeps instead of waiting"""
+    sleeps = []
+    real_sleep = asyncio.sleep
+    clock = [time.monotonic()]
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock[0] += delay
+        await real_sleep(0)
+
+    # Sleeps advance the rate limiter's clock, so throttled keys free up without real waiting
+    monkeypatch.setattr(response_validator_deepseek.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: clock[0])
+
+    def install(*responses):
+        session = FakeSession(responses)
+        validator._get_session = lambda: session
+        return session
+
+    install.sleeps = sleeps
+    return install
+
+def test_long_retry_after_fails_instead_of_waiting(validator, http):
+    """A 429 asking for longer than max_retry_wait gives up rather than stalling the run"""
+    session = http(FakeResponse(429, {"retry-after": "7200"}), FakeResponse(200, body=completion("{}")))
+
+    assert asyncio.run(validator._post_with_retries_async("http://deepseek.test", PAYLOAD)) is None
+    assert session.posts == 1
+    assert all(delay <= validator.max_retry_wait for delay in http.sleeps)
+
+def test_bad_batched_row_falls_back_alone(validator, http):
+    """An unusable row gets default scores without discarding or caching around the others"""
+    rows = [
+        ("Hello from Dubai.", "en", TEST_CASE),
+        ("Hello from Sharjah.", "en", TEST_CASE),
+        ("Hello from Ajman.", "en", TEST_CASE)
+    ]
+    http(FakeResponse(200, body=completion(json.dumps([
+        {"clarity": {"score": 0.9}, "hallucination": {"score": 1.0}, "language_specific": {"score": 0.8}},
+        {"clarity": {"score": None}},
+        "high"
+    ]))))
+
+    analyses = asyncio.run(validator._get_batched_analysis_async(rows))
+
+    assert analyses[0]["clarity"]["score"] == 0.9
+    assert analyses[1] == validator._get_default_scores()
+    assert analyses[2] == validator._get_default_scores()
+    async def lookup():
+        return [await validator._get_cached_analysis(validator._validation_key(*row)) for row in rows]
+
+    cached = asyncio.run(lookup())
+    assert cached[0] is analyses[0]
+    assert cached[1:] == [None, None]
+
+@pytest.mark.parametrize("content", [
+    '{"clarity": {"score": 0.7}}',
+    '```json\n{"clarity": {"score": 0.7}}\n```',
+    '```JSON {"clarity": {"score": 0.7}} ```',
+    '  \n```\n{"clarity": {"score": 0.7}}\n```\n  '
+])
+def test_load_response_content_strips_code_fences(validator, content):
+    """Fenced output decodes the same whatever the fence's case, language tag or surrounding whitespace"""
+    assert validator._load_response_content(completion(content), 16) == {"clarity": {"score": 0.7}}
+
+def test_load_response_content_repairs_truncated_json(validator):
+    """Output cut off mid-object is repaired so the scores it already holds survive"""
+    content = '{"clarity": {"score": 0.8, "explanation": "Clear"}, "language_specific": {"score": 0.'
+
+    results = validator._load_response_content(completion(content, finish_reason="length"), 16)
+
+    assert results["clarity"]["score"] == 0.8
+
+@pytest.mark.parametrize("content", ["I cannot score this response.", "", "```json\n```"])
+def test_load_response_content_rejects_unrepairable_output(validator, content):
+    """Output that repairs to nothing usable is reported as None"""
+    assert validator._load_response_content(completion(content), 16) is None
+
+def test_load_response_content_without_choices(validator):
+    """A reply without choices is unusable"""
+    assert validator._load_response_content({"choices": []}, 16) is None
+    assert validator._load_response_content({}, 16) is None
+
+@pytest.mark.parametrize("api_key", [
+    "language_specific",
+    "Language Specific",
+    "language-specific-requirements",
+    "Language_Specific_Requirement",
+    "LanguageSpecificRequirements",
+    "languagespecific"
+])
+def test_extract_scores_normalizes_key_spellings(validator, api_key):
+    """Every spelling in SCORE_KEY_MAP lands on our language_specific key"""
+    results = validator._extract_scores({api_key: {"score": 0.6}})
+
+    assert results["language_specific"]["score"] == 0.6
+
+def test_extract_scores_reads_nested_and_bare_scores(validator):
+    """Scores may sit under 'scores' and be bare numbers; unknown keys are ignored"""
+    results = validator._extract_scores({"scores": {"Clarity": 0.5, "Semantic Similarity": {"score": "0.25"}, "tone": 1}})
+
+    assert results["clarity"]["score"] == 0.5
+    assert results["semantic_similarity"]["score"] == 0.25
+    assert "tone" not in results
+    assert results["formatting"]["score"] == 0.0
+
+def post(validator):
+    """Send PAYLOAD through _post_with_retries_async"""
+    return asyncio.run(validator._post_with_retries_async("http://deepseek.test", PAYLOAD))
+
+def test_post_returns_decoded_body(validator, http):
+    """A 200 response is decoded and returned after one attempt"""
+    session = http(FakeResponse(200, body=completion("{}")))
+
+    assert post(validator) == completion("{}")
+    assert session.posts == 1
+
+def test_post_retries_server_errors_with_capped_backoff(validator, http):
+    """5xx responses are retried with backoff no longer than max_retry_wait"""
+    session = http(FakeResponse(503), FakeResponse(502), FakeResponse(200, body=completion("{}")))
+
+    assert post(validator) == completion("{}")
+    assert session.posts == 3
+    assert len(http.sleeps) == 2
+    assert all(0 < delay <= validator.max_retry_wait for delay in http.sleeps)
+
+def test_post_gives_up_after_max_retries(validator, http):
+    """Persistent 5xx responses fail after max_retries attempts without a final wasted wait"""
+    session = http(*(FakeResponse(500) for _ in range(validator.max_retries)))
+
+    assert post(validator) is None
+    assert session.posts == validator.max_retries
+    assert len(http.sleeps) == validator.max_retries - 1
+
+def test_post_does_not_retry_client_errors(validator, http):
+    """A 4xx other than 429 fails straight away"""
+    session = http(FakeResponse(400), FakeResponse(200, body=completion("{}")))
+
+    assert post(validator) is None
+    assert session.posts == 1
+
+def test_post_rests_key_after_429_without_retry_after(validator, http):
+    """A bare 429 rests the key for one refill interval before the next attempt"""
+    session = http(FakeResponse(429), FakeResponse(200, body=completion("{}")))
+
+    assert post(validator) == completion("{}")
+    assert session.posts == 2
+    assert http.sleeps == [pytest.approx(60.0 / config["api"]["rpm"])]
+
+def test_post_honours_short_retry_after(validator, http):
+    """A 429 whose Retry-After fits within max_retry_wait is waited out on that key"""
+    session = http(FakeResponse(429, {"retry-after": "4"}), FakeResponse(200, body=completion("{}")))
+
+    assert post(validator) == completion("{}")
+    assert session.posts == 2
+    assert http.sleeps == [pytest.approx(4.0)]
+
+def test_post_retries_connection_errors(validator, http):
+    """Transport errors are retried like server errors"""
+    session = http(aiohttp.ClientConnectionError("reset"), FakeResponse(200, body=completion("{}")))
+
+    assert post(validator) == completion("{}")
+    assert session.posts == 2
+
+def test_truncation_warning_reports_request_max_tokens(validator):
+    """A cut-off completion is logged with the max_tokens the request was sent with"""
+    messages = []
+    sink = logger.add(messages.append, level="WARNING")
+    try:
+        validator._load_response_content(completion('{"clarity": {"score": 0.5}}', finish_reason="length"), 2048)
+    finally:
+        logger.remove(sink)
+
+    assert any("max_tokens=2048" in message for message in messages)
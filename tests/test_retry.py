@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from utils import retry as retry_module
+from utils.retry import aretry, retry, retry_with_timeout
+
+class HeaderError(Exception):
+    """Error carrying HTTP headers itself, like aiohttp.ClientResponseError"""
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.headers = headers
+
+class ResponseError(Exception):
+    """Error carrying a response with headers, like requests.HTTPError"""
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": headers})()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record requested delays instead of sleeping"""
+    delays = []
+
+    async def fake_async_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(retry_module.time, "sleep", delays.append)
+    monkeypatch.setattr(retry_module.asyncio, "sleep", fake_async_sleep)
+    return delays
+
+def flaky(failures, error=ValueError("boom")):
+    """Build a function that raises for its first calls and then succeeds"""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return len(calls)
+    func.calls = calls
+    return func
+
+def test_retry_returns_first_success(sleeps):
+    """retry() keeps calling until the function stops raising"""
+    func = flaky(2)
+
+    assert retry(max_attempts=3, jitter=False)(func)() == 3
+    assert sleeps == [1, 2]
+
+def test_retry_raises_last_error_when_exhausted(sleeps):
+    """The last error is re-raised once attempts run out"""
+    func = flaky(5)
+
+    with pytest.raises(ValueError):
+        retry(max_attempts=3, jitter=False)(func)()
+    assert len(func.calls) == 3
+
+def test_retry_returns_none_without_reraise(sleeps):
+    """reraise=False turns exhaustion into a None result"""
+    assert retry(max_attempts=2, reraise=False)(flaky(5))() is None
+
+def test_retry_ignores_other_errors(sleeps):
+    """Only errors listed in retry_on are retried"""
+    func = flaky(1, KeyError("missing"))
+
+    with pytest.raises(KeyError):
+        retry(max_attempts=3, retry_on=(ValueError,))(func)()
+    assert len(func.calls) == 1
+
+def test_retry_caps_and_jitters_backoff(sleeps, monkeypatch):
+    """Backoff doubles up to max_delay and jitter adds at most half the delay"""
+    monkeypatch.setattr(retry_module.random, "uniform", lambda low, high: high)
+
+    retry(max_attempts=5, base=1, max_delay=3, timeout=100, reraise=False)(flaky(5))()
+
+    assert sleeps == [1.5, 3, 4.5, 4.5]
+
+def test_retry_stops_before_exceeding_timeout(sleeps):
+    """No retry is scheduled if its delay would overrun the total timeout"""
+    func = flaky(5)
+
+    with pytest.raises(ValueError):
+        retry(max_attempts=5, base=4, timeout=5, jitter=False)(func)()
+    assert len(func.calls) == 2
+    assert sleeps == [4]
+
+@pytest.mark.parametrize("error", [HeaderError({"Retry-After": "7"}), ResponseError({"Retry-After": "7"})])
+def test_retry_honours_retry_after(sleeps, error):
+    """Retry-After is read from the error's own headers or from its response"""
+    retry(max_attempts=2, timeout=100, retry_on=(Exception,))(flaky(1, error))()
+
+    assert sleeps == [7.0]
+
+def test_retry_rejects_zero_attempts():
+    """max_attempts below one is a configuration error"""
+    with pytest.raises(ValueError):
+        retry(max_attempts=0)
+    with pytest.raises(ValueError):
+        aretry(max_attempts=0)
+
+def test_aretry_retries_coroutines(sleeps):
+    """aretry() awaits the coroutine again after asyncio.sleep"""
+    func = flaky(1, HeaderError({"Retry-After": "2"}))
+
+    @aretry(max_attempts=3, timeout=100)
+    async def call():
+        return func()
+
+    assert asyncio.run(call()) == 2
+    assert sleeps == [2.0]
+
+def test_retry_with_timeout_returns_falsy_results(sleeps):
+    """retry_with_timeout() returns the result even when it is falsy"""
+    assert retry_with_timeout(lambda: 0) == 0
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import List, Mapping, Optional, Tuple, TypedDict
+from loguru import logger
+
+class RateLimiter:
+    """
+    Client-side token bucket limiting both requests and tokens per minute.
+
+    Capacity is replenished continuously, so callers wait just long enough
+    for a slot instead of discovering the limit through a 429 response.
+    Pauses are capped at max_pause seconds, so a quota-style Retry-After of
+    hours cannot hold every caller for that long.
+    """
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_pause: float = 30.0):
+        self.max_requests_per_minute = requests_per_minute
+        self.max_tokens_per_minute = tokens_per_minute
+        self.max_pause = max_pause
+        self.available_request_capacity = requests_per_minute
+        self.available_token_capacity = tokens_per_minute
+        self.last_update_time = time.monotonic()
+        self.paused_until = 0.0
+
+    def _replenish(self):
+        """Refill both buckets for the time elapsed since the last update"""
+        now = time.monotonic()
+        elapsed = now - self.last_update_time
+        self.available_request_capacity = min(
+            self.available_request_capacity + self.max_requests_per_minute * elapsed / 60.0,
+            self.max_requests_per_minute
+        )
+        self.available_token_capacity = min(
+            self.available_token_capacity + self.max_tokens_per_minute * elapsed / 60.0,
+            self.max_tokens_per_minute
+        )
+        self.last_update_time = now
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """Wait until there is capacity for one request of roughly estimated_tokens tokens"""
+        # A request larger than the whole bucket would otherwise wait forever
+        tokens = min(estimated_tokens, self.max_tokens_per_minute)
+
+        while True:
+            self._replenish()
+            now = time.monotonic()
+
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+
+            if self.available_request_capacity >= 1 and self.available_token_capacity >= tokens:
+                self.available_request_capacity -= 1
+                self.available_token_capacity -= tokens
+                return
+
+            # Sleep until the scarcer of the two buckets has enough capacity
+            request_wait = (1 - self.available_request_capacity) * 60.0 / self.max_requests_per_minute
+            token_wait = (tokens - self.available_token_capacity) * 60.0 / self.max_tokens_per_minute
+            await asyncio.sleep(max(request_wait, token_wait, 0.01))
+
+    def pause(self, seconds: float):
+        """Stop handing out capacity for the given number of seconds, at most max_pause"""
+        self.paused_until = max(self.paused_until, time.monotonic() + min(seconds, self.max_pause))
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Re-sync the buckets with the provider's rate limit headers.
+
+        Returns:
+            The Retry-After delay in seconds if the provider sent one
+        """
+        remaining_requests = _parse_float(headers.get("x-ratelimit-remaining-requests"))
+        if remaining_requests is not None:
+            self.available_request_capacity = min(self.available_request_capacity, remaining_requests)
+
+        remaining_tokens = _parse_float(headers.get("x-ratelimit-remaining-tokens"))
+        if remaining_tokens is not None:
+            self.available_token_capacity = min(self.available_token_capacity, remaining_tokens)
+
+        retry_after = _parse_float(headers.get("retry-after"))
+        if retry_after is not None:
+            logger.info(f"Provider requested a {retry_after:.1f} second pause")
+            self.pause(retry_after)
+        return retry_after
+
+class KeyEntry(TypedDict):
+    """An API key with its own limiter and the monotonic time it was last handed out"""
+    key: str
+    limiter: RateLimiter
+    last_used: float
+
+class ApiKeyScheduler:
+    """
+    Spreads requests over several API keys, each with its own RateLimiter.
+
+    The next key is the one that is available soonest, then the one with the
+    most remaining request capacity, then the least recently used, so a key
+    that was just throttled is skipped while the others still have quota.
+    """
+    def __init__(self, api_keys: List[str], requests_per_minute: float, tokens_per_minute: float,
+                 max_pause: float = 30.0):
+        self._keys: List[KeyEntry] = [
+            {
+                "key": key,
+                "limiter": RateLimiter(requests_per_minute, tokens_per_minute, max_pause),
+                "last_used": 0.0
+            }
+            for key in api_keys
+        ]
+
+    def _rank(self, entry: KeyEntry, now: float) -> Tuple[float, float, float]:
+        """Sort key preferring available, high-quota, least recently used keys"""
+        limiter = entry["limiter"]
+        limiter._replenish()
+        return (
+            max(limiter.paused_until - now, 0.0),
+            -limiter.available_request_capacity,
+            entry["last_used"]
+        )
+
+    async def acquire(self, estimated_tokens: int = 0) -> KeyEntry:
+        """Pick the best key and wait for capacity on it"""
+        now = time.monotonic()
+        entry = min(self._keys, key=lambda k: self._rank(k, now))
+        entry["last_used"] = now
+        await entry["limiter"].acquire(estimated_tokens)
+        return entry
+
+    def update_from_headers(self, entry: KeyEntry, headers: Mapping[str, str]) -> Optional[float]:
+        """Re-sync the chosen key's limiter; returns the Retry-After delay if one was sent"""
+        return entry["limiter"].update_from_headers(headers)
+
+    def throttle(self, entry: KeyEntry, seconds: float):
+        """Keep a key out of rotation for the given number of seconds"""
+        entry["limiter"].pause(seconds)
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    """Parse a numeric header value, ignoring missing or malformed values"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
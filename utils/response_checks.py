@@ -0,0 +1,35 @@
+from typing import Any, Dict, List
+
+# Sentence-ending punctuation, including the Arabic question mark and full stop
+TERMINAL_PUNCTUATION = ".!?؟۔"
+
+def check_hallucination(response: str, expected_contains: List[str]) -> float:
+    """Share of the expected content present in the response"""
+    if not expected_contains:
+        return 1.0
+    lowered = response.lower()
+    return sum(item.lower() in lowered for item in expected_contains) / len(expected_contains)
+
+def check_formatting(response: str) -> float:
+    """Score capitalization of the first character and terminal punctuation"""
+    stripped = response.strip()
+    if not stripped:
+        return 0.0
+    first = stripped[0]
+    # Caseless scripts such as Arabic have no capital letters to check
+    capitalized = first.isupper() or (first.isalpha() and first.lower() == first.upper())
+    return 0.5 * capitalized + 0.5 * (stripped[-1] in TERMINAL_PUNCTUATION)
+
+def check_completeness(response: str, validation_criteria: Dict[str, Any]) -> float:
+    """Score the length bounds and required keyword coverage"""
+    score = 0.0
+    if validation_criteria.get('min_length', 0) <= len(response) <= validation_criteria.get('max_length', 1000):
+        score += 0.4
+    
+    required_keywords = validation_criteria.get('required_keywords', [])
+    if required_keywords:
+        lowered = response.lower()
+        score += 0.6 * sum(k.lower() in lowered for k in required_keywords) / len(required_keywords)
+    else:
+        score += 0.6
+    return min(1.0, score)
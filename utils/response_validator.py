@@ -1,6 +1,7 @@
 import json
 from typing import Dict, Any
 from loguru import logger
+from .response_checks import check_completeness, check_formatting, check_hallucination
 
 class ResponseValidator:
     def __init__(self, config: Dict[str, Any]):
@@ -70,40 +71,15 @@ class ResponseValidator:
     
     def _check_hallucination(self, response: str, expected_contains: list) -> Dict[str, Any]:
         """Check for response hallucination"""
-        # Check if response contains expected keywords
-        matches = sum(1 for keyword in expected_contains if keyword.lower() in response.lower())
-        score = matches / len(expected_contains)
-        return {"score": score}
+        return {"score": check_hallucination(response, expected_contains)}
     
     def _check_formatting(self, response: str) -> Dict[str, Any]:
         """Check response formatting"""
-        score = 0.0
-        
-        # Check capitalization
-        if response[0].isupper():
-            score += 0.5
-            
-        # Check punctuation
-        if response[-1] in ".!?":
-            score += 0.5
-            
-        return {"score": score}
+        return {"score": check_formatting(response)}
     
     def _check_completeness(self, response: str, validation_criteria: Dict[str, Any]) -> Dict[str, Any]:
         """Check response completeness"""
-        score = 0.0
-        
-        # Check length requirements
-        if validation_criteria["min_length"] <= len(response) <= validation_criteria["max_length"]:
-            score += 0.4
-            
-        # Check required keywords
-        keywords_present = sum(1 for keyword in validation_criteria["required_keywords"] 
-                             if keyword.lower() in response.lower())
-        keyword_score = keywords_present / len(validation_criteria["required_keywords"])
-        score += 0.6 * keyword_score
-        
-        return {"score": min(1.0, score)}
+        return {"score": check_completeness(response, validation_criteria)}
     
     def _check_language_specific(self, response: str, language: str, validation_criteria: Dict[str, Any]) -> Dict[str, Any]:
         """Check language-specific requirements"""
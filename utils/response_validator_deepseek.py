@@ -1,201 +1,754 @@
-import json
-from typing import Dict, Any
-from loguru import logger
-import requests
-import time
+import hashlib
 import re
-from functools import lru_cache
+import orjson
+import json_repair
+from typing import Dict, Any, Coroutine, Optional, List, Tuple, TypeVar
+from loguru import logger
+import aiohttp
+import asyncio
 import random
+import threading
+import time
+import redis
+import redis.asyncio
+import tiktoken
+from cachetools import LRUCache, TTLCache
+from .rate_limiter import ApiKeyScheduler
+from .response_checks import check_completeness, check_formatting, check_hallucination
+
+# Transient server-side failures worth retrying
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+T = TypeVar("T")
+
+# A (response, language, test_case) row, and a batch row waiting on the API as (index, cache_key, row)
+ValidationRow = Tuple[str, str, Dict[str, Any]]
+PendingRow = Tuple[int, str, ValidationRow]
+
+# Score keys produced by validate_response and compare_responses
+VALIDATION_KEYS = ("clarity", "hallucination", "formatting", "completeness", "language_specific")
+COMPARISON_KEYS = ("semantic_similarity", "information_consistency", "structure_similarity")
+
+# Validation aspects that need Deepseek's judgement, with the question asked for each; the rest
+# are checked locally, and hallucination blends the local coverage check with Deepseek's judgement
+SUBJECTIVE_ASPECTS: Dict[str, str] = {
+    'clarity': "Clarity: How clear and well-structured is the response?",
+    'hallucination': "Hallucination: Does the response avoid adding false or unsupported information?",
+    'language_specific': "Language-specific requirements: Does the response follow language-specific patterns and requirements?"
+}
+SUBJECTIVE_KEYS = tuple(SUBJECTIVE_ASPECTS)
+
+# Normalized API keys (lowercase, underscores) mapped onto our result keys
+SCORE_KEY_MAP: Dict[str, str] = {
+    'clarity': 'clarity',
+    'hallucination': 'hallucination',
+    'formatting': 'formatting',
+    'completeness': 'completeness',
+    'language_specific': 'language_specific',
+    'language_specific_requirement': 'language_specific',
+    'language_specific_requirements': 'language_specific',
+    'languagespecific': 'language_specific',
+    'languagespecificrequirement': 'language_specific',
+    'languagespecificrequirements': 'language_specific',
+    'semantic_similarity': 'semantic_similarity',
+    'information_consistency': 'information_consistency',
+    'structure_similarity': 'structure_similarity'
+}
+
+# Fallback scores used whenever the API cannot produce an analysis
+DEFAULT_SCORES: Dict[str, Dict[str, float]] = {
+    'clarity': {'score': 0.4},
+    'hallucination': {'score': 0.5},
+    'formatting': {'score': 0.5},
+    'completeness': {'score': 0.7},
+    'language_specific': {'score': 0.3},
+    'semantic_similarity': {'score': 0.4},
+    'information_consistency': {'score': 0.5},
+    'structure_similarity': {'score': 0.5}
+}
+
+# Markdown code fence around model output, in any case and with surrounding whitespace
+CONTENT_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+# Prompt templates are built once at import time and filled with str.format_map per call
+_SCORE_ASPECTS = "\n".join(f"{number}. {question}" for number, question in enumerate(SUBJECTIVE_ASPECTS.values(), start=1))
+
+_SCORE_FORMAT = ",\n".join(
+    '    "%s": {{\n        "score": <score>,\n        "explanation": "<brief explanation>"\n    }}' % key
+    for key in SUBJECTIVE_KEYS
+)
+
+_CRITERIA_LINES = """- Expected tone: {expected_tone}"""
+
+VALIDATION_PROMPT_TEMPLATE = """Please analyze the following response in {language} and provide scores for different aspects:
+
+Response: {response}
+
+Validation Criteria:
+""" + _CRITERIA_LINES + """
+
+Please provide scores (0-1) and brief explanations for:
+""" + _SCORE_ASPECTS + """
+
+Format your response as a JSON object with these exact keys:
+{{
+""" + _SCORE_FORMAT + """
+}}"""
+
+COMPARISON_PROMPT_TEMPLATE = """Please compare an English and an Arabic response to the same query and analyze their cross-language consistency:
+
+Test Case ID: {test_case_id}
+
+English excerpt ({en_length} characters in full): {en_excerpt}
+English validation scores: {en_scores}
+
+Arabic excerpt ({ar_length} characters in full): {ar_excerpt}
+Arabic validation scores: {ar_scores}
+
+Please analyze and provide scores (0-1) for:
+1. Semantic similarity: How well do the responses convey the same meaning and intent across languages?
+2. Information consistency: Are the key points, facts, and details consistent between both language versions?
+3. Structure similarity: How similar is the organization, flow, and presentation of information?
+
+Return a JSON object with these exact keys: semantic_similarity, information_consistency, structure_similarity.
+Each key maps to {{"score": <score>, "explanation": "<brief explanation>"}}."""
+
+BATCHED_ROW_TEMPLATE = """### Row {number} ({language})
+Response: {response}
+""" + _CRITERIA_LINES
+
+# Rough token cost of a row's header and criteria lines, on top of its response
+BATCHED_ROW_OVERHEAD_TOKENS = 24
+
+BATCHED_VALIDATION_PROMPT_TEMPLATE = """Please analyze each of the following {count} responses independently and provide scores for different aspects:
+
+{rows}
+
+For every row, provide scores (0-1) and brief explanations for:
+""" + _SCORE_ASPECTS + """
+
+Return a JSON array of length {count}, one object per row in the same order, each with these exact keys:
+""" + ", ".join(SUBJECTIVE_KEYS) + """.
+Each key maps to {{"score": <score>, "explanation": "<brief explanation>"}}."""
 
 class ResponseValidatorDeepseek:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.thresholds = config["validation"]["thresholds"]
         self.api_keys = config["api"]["api_keys"]
-        self.current_key_index = 0
-        self.api_url = config["api"]["url"]
-        self.model = config["api"]["model"]
+        self.api_url: str = config["api"]["url"]
+        self.model: str = config["api"]["model"]
         self.headers = {
             "Content-Type": "application/json"
         }
-        self.system_prompt = config["api"]["system_message"]
-        
-        # Define regex patterns for key matching
-        self.key_patterns = {
-            re.compile(r'^[Cc]larity$'): 'clarity',
-            re.compile(r'^[Hh]allucination$'): 'hallucination',
-            re.compile(r'^[Ff]ormatting$'): 'formatting',
-            re.compile(r'^[Cc]ompleteness$'): 'completeness',
-            re.compile(r'^[Ll]anguage[-\s]?[Ss]pecific[-\s]?[Rr]equirements?$'): 'language_specific'
-        }
+        self.system_prompt: str = config["api"]["system_message"]
+        self.current_test_case: Optional[Dict[str, Any]] = None
         
-        # Initialize response cache
-        self.response_cache = {}
-        self.cache_ttl = 1800  # 30 minutes cache TTL
-
-    def _get_next_api_key(self) -> str:
-        """Get the next API key in rotation"""
-        key = self.api_keys[self.current_key_index]
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        return key
-
-    @lru_cache(maxsize=100)
-    def _get_cached_analysis(self, response_hash: str) -> Dict[str, Any]:
-        """Get cached analysis if available and not expired"""
-        if response_hash in self.response_cache:
-            cache_entry = self.response_cache[response_hash]
-            if time.time() - cache_entry['timestamp'] < self.cache_ttl:
-                return cache_entry['results']
-        return None
+        # Initialize response cache shared across workers and restarts
+        cache_config = config.get("cache", {})
+        # Async client so lookups never block the worker loop; short timeouts bound an unreachable host
+        self.redis = redis.asyncio.Redis.from_url(
+            cache_config.get("url", "redis://localhost:6379/0"),
+            socket_timeout=cache_config.get("socket_timeout", 0.5),
+            socket_connect_timeout=cache_config.get("connect_timeout", 0.5)
+        )
+        self.cache_ttl = cache_config.get("ttl", 1800)  # 30 minutes cache TTL
+        
+        # After a Redis failure the tier is skipped for this many seconds instead of retried per lookup
+        self.redis_retry_interval: float = cache_config.get("retry_interval", 30)
+        self._redis_down_until = 0.0
+        
+        # Bounded in-process tier in front of Redis; it only ever holds real results
+        self.local_cache: "TTLCache[str, Dict[str, Any]]" = TTLCache(maxsize=cache_config.get("local_maxsize", 1024), ttl=self.cache_ttl)
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+
+        # Shared keep-alive HTTP session and concurrency guard, created lazily on the worker loop
+        self.max_concurrency = config["api"].get("max_concurrency", 5)
+        self.pool_size = config["api"].get("pool_size", 32)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        
+        # Analyses currently being requested, keyed by cache key, so duplicates can await them
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Event loop that owns the session and all in-flight work, run on a worker thread so
+        # sync callers also work from code that already has a running loop (e.g. sync_playwright)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        
+        # Bound every request so a slow or verbose completion cannot pin a worker
+        self.max_output_tokens: int = config["api"].get("max_output_tokens", 512)
+        self.max_retries: int = config["api"].get("max_retries", 3)
+        connect_timeout = config["api"].get("connect_timeout", 5)
+        read_timeout = config["api"].get("read_timeout", 25)
+        self.request_timeout = aiohttp.ClientTimeout(
+            total=connect_timeout + read_timeout,
+            connect=connect_timeout,
+            sock_read=read_timeout
+        )
+        
+        # Longest wait between attempts; a longer Retry-After fails the request instead
+        self.max_retry_wait: float = config["api"].get("max_retry_wait", 30)
+        
+        # Proactive per-key limits, re-synced from the provider's rate limit headers
+        self.key_scheduler = ApiKeyScheduler(
+            self.api_keys,
+            config["api"].get("rpm", 20),
+            config["api"].get("tpm", 100000),
+            self.max_retry_wait
+        )
+        
+        # Number of responses marshaled into a single batched validation prompt
+        self.marshal_batch_size: int = config["api"].get("marshal_batch_size", 4)
+        self.max_prompt_tokens: int = config["api"].get("max_prompt_tokens", 6000)
+        
+        # Characters of each response quoted in the cross-language comparison prompt
+        self.comparison_excerpt_chars: int = config["api"].get("comparison_excerpt_chars", 400)
+        
+        # Token estimates drive batch packing and tokens-per-minute limiting
+        # The tokenizer may need a download, so it is loaded on a background thread on first use
+        # and a length estimate stands in until it is ready; a failed load is not retried
+        self._token_cache: "LRUCache[int, int]" = LRUCache(maxsize=4096)
+        self._enc: Optional[Any] = None
+        self._enc_ready = threading.Event()
+        self._enc_thread: Optional[threading.Thread] = None
+
+    def _get_encoder(self) -> Optional[Any]:
+        """Get the tokenizer, starting its load off the event loop on first use; None until it is ready"""
+        if self._enc_thread is None:
+            self._enc_thread = threading.Thread(target=self._load_encoder, name="deepseek-tokenizer", daemon=True)
+            self._enc_thread.start()
+        return self._enc if self._enc_ready.is_set() else None
+
+    def _load_encoder(self) -> None:
+        """Load the tokenizer; runs on its own thread because tiktoken may download the encoding"""
+        try:
+            # Deepseek's tokenizer is not bundled with tiktoken; a comparable BPE is close enough
+            self._enc = tiktoken.encoding_for_model("gpt-4o-mini")
+        except Exception as e:
+            logger.warning(f"Tokenizer unavailable, estimating tokens from length: {str(e)}")
+        finally:
+            self._enc_ready.set()
+
+    def _tokens(self, text: str) -> int:
+        """Estimate the token count of a piece of text, cached per text once the tokenizer has settled"""
+        text_hash = hash(text)
+        count = self._token_cache.get(text_hash)
+        if count is None:
+            enc = self._get_encoder()
+            count = len(enc.encode_ordinary(text)) if enc is not None else len(text) // 4
+            # Length estimates made while the tokenizer is still loading are not worth keeping
+            if self._enc_ready.is_set():
+                self._token_cache[text_hash] = count
+        return count
+
+    def _estimate_request_tokens(self, payload: Dict[str, Any]) -> int:
+        """Estimate the tokens a request spends against the TPM budget, prompt plus completion"""
+        prompt_tokens = sum(self._tokens(message["content"]) for message in payload["messages"])
+        return prompt_tokens + payload.get("max_tokens", 0)
+
+    def _key(self, response: str, criteria: Dict[str, Any]) -> str:
+        """Build a cache key that is stable across processes and dict ordering"""
+        canonical = orjson.dumps(
+            {"r": response, "c": criteria, "m": self.model, "s": self.system_prompt},
+            option=orjson.OPT_SORT_KEYS
+        )
+        return f"dsv:{hashlib.blake2b(canonical, digest_size=16).hexdigest()}"
+
+    def _validation_key(self, response: str, language: str, test_case: Dict[str, Any]) -> str:
+        """Cache key for Deepseek's subjective scoring of a response; only tone and language feed the prompt"""
+        validation_criteria = test_case["queries"][language]["validation"]
+        return self._key(response, {
+            "kind": "subjective_validation",
+            "aspects": SUBJECTIVE_KEYS,
+            "language": language,
+            "expected_tone": validation_criteria.get('expected_tone', 'friendly')
+        })
+
+    async def _get_cached_analysis(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Get cached analysis if available; both tiers expire entries after the cache TTL"""
+        results = self.local_cache.get(cache_key)
+        if results is not None:
+            self.cache_hits += 1
+            return results
+        
+        cached: Optional[bytes] = None
+        if self._redis_available():
+            try:
+                cached = await self.redis.get(cache_key)
+            except redis.RedisError as e:
+                self._redis_failed("lookup", e)
+        
+        if cached is None:
+            self.cache_misses += 1
+            return None
+        
+        self.cache_hits += 1
+        results = orjson.loads(cached)
+        self.local_cache[cache_key] = results
+        return results
+
+    async def _store_cached_analysis(self, cache_key: str, results: Dict[str, Any]) -> None:
+        """Store analysis results in the cache for the cache TTL"""
+        self.local_cache[cache_key] = results
+        if not self._redis_available():
+            return
+        try:
+            await self.redis.setex(cache_key, self.cache_ttl, orjson.dumps(results))
+        except redis.RedisError as e:
+            self._redis_failed("write", e)
+
+    def _redis_available(self) -> bool:
+        """Whether the Redis tier is in use, i.e. not backing off after a failure"""
+        return time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, operation: str, error: Exception) -> None:
+        """Skip the Redis tier for redis_retry_interval seconds after a failed operation"""
+        logger.warning(f"Cache {operation} failed, skipping Redis for {self.redis_retry_interval} seconds: {str(error)}")
+        self._redis_down_until = time.monotonic() + self.redis_retry_interval
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use; only called on the worker loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+        return self._session
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the concurrency guard, creating it on first use; only called on the worker loop"""
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        return self._sem
+
+    async def close(self) -> None:
+        """Close the shared HTTP session on the worker loop that created it"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        await self._on_worker(self._close_session())
+
+    async def _close_session(self) -> None:
+        """Close the shared HTTP session and Redis connections; only called on the worker loop"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._sem = None
+        
+        # Redis connections are bound to this loop; the client reconnects on the next one
+        try:
+            await self.redis.aclose()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to close Redis connections: {str(e)}")
+
+    def shutdown(self) -> None:
+        """Close the HTTP session and stop the worker loop used by the sync wrappers"""
+        if self._loop is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if self._loop_thread is not None:
+                self._loop_thread.join()
+            self._loop.close()
+        self._loop = None
+        self._loop_thread = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the worker loop, starting it on a daemon thread on first use"""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(
+                target=self._loop.run_forever, name="deepseek-validator", daemon=True
+            )
+            self._loop_thread.start()
+        return self._loop
+
+    def _run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine to completion on the worker loop for synchronous callers"""
+        loop = self._get_loop()
+        if threading.current_thread() is self._loop_thread:
+            coro.close()
+            raise RuntimeError("Synchronous validator methods cannot be called from the validator's own loop")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    async def _on_worker(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Await a coroutine on the worker loop, so the session and in-flight futures never change loops"""
+        loop = self._get_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
 
     def validate_response(self, response: str, language: str, test_case: Dict[str, Any]) -> Dict[str, Any]:
         """Validate a single response using Deepseek"""
+        return self._run(self._validate_response(response, language, test_case))
+
+    def compare_responses(self, en_response: str, ar_response: str, test_case: Dict[str, Any],
+                          en_scores: Optional[Dict[str, Any]] = None,
+                          ar_scores: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Compare responses between English and Arabic using Deepseek, optionally given their validation results"""
+        return self._run(self._compare_responses(en_response, ar_response, test_case, en_scores, ar_scores))
+
+    def validate_responses(self, batch: List[ValidationRow]) -> List[Dict[str, Any]]:
+        """Validate several (response, language, test_case) rows using batched Deepseek prompts"""
+        return self._run(self._validate_responses(batch))
+
+    def validate_many(self, cases: List[ValidationRow]) -> List[Dict[str, Any]]:
+        """Validate several (response, language, test_case) rows with concurrent Deepseek requests"""
+        return self._run(self._validate_many(cases))
+
+    async def validate_response_async(self, response: str, language: str, test_case: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a single response using Deepseek without blocking the event loop"""
+        return await self._on_worker(self._validate_response(response, language, test_case))
+
+    async def compare_responses_async(self, en_response: str, ar_response: str, test_case: Dict[str, Any],
+                                      en_scores: Optional[Dict[str, Any]] = None,
+                                      ar_scores: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Compare responses between English and Arabic, optionally given their validation results, without blocking"""
+        return await self._on_worker(self._compare_responses(en_response, ar_response, test_case, en_scores, ar_scores))
+
+    async def validate_responses_async(self, batch: List[ValidationRow]) -> List[Dict[str, Any]]:
+        """Validate several rows using batched Deepseek prompts without blocking the event loop"""
+        return await self._on_worker(self._validate_responses(batch))
+
+    async def validate_many_async(self, cases: List[ValidationRow]) -> List[Dict[str, Any]]:
+        """Validate several rows with concurrent Deepseek requests without blocking the event loop"""
+        return await self._on_worker(self._validate_many(cases))
+
+    async def _validate_response(self, response: str, language: str, test_case: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a single response on the worker loop"""
         validation_criteria = test_case["queries"][language]["validation"]
-        expected_contains = test_case["queries"][language]["expected_contains"]
         
         # Store the current test case for API logging
         self.current_test_case = test_case
         
         # Prepare prompt for Deepseek
-        prompt = self._create_validation_prompt(response, validation_criteria, expected_contains, language)
+        prompt = self._create_validation_prompt(response, validation_criteria, language)
         
-        # Get Deepseek's analysis
-        analysis = self._get_deepseek_analysis(response, validation_criteria)
+        # Get Deepseek's analysis of the subjective aspects
+        analysis = await self._get_deepseek_analysis_async(
+            prompt, self._validation_key(response, language, test_case)
+        )
         
-        # Process and structure the results
-        results = {
-            "clarity": self._extract_clarity_score(analysis),
-            "hallucination": self._extract_hallucination_score(analysis, expected_contains),
-            "formatting": self._extract_formatting_score(analysis),
-            "completeness": self._extract_completeness_score(analysis, validation_criteria),
-            "language_specific": self._extract_language_specific_score(analysis, language)
+        results = self._build_validation_results(analysis, response, language, test_case)
+        logger.info(f"Deepseek validation results for {test_case['id']}: {results}")
+        return results
+
+    async def _validate_many(self, cases: List[ValidationRow]) -> List[Dict[str, Any]]:
+        """Validate several responses concurrently, one request each, bounded by max_concurrency"""
+        outcomes = await asyncio.gather(
+            *(self._validate_response(response, language, test_case)
+              for response, language, test_case in cases),
+            return_exceptions=True
+        )
+        
+        results: List[Dict[str, Any]] = []
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                # A cancelled row falls back like a failed one; anything else is not ours to swallow
+                if not isinstance(outcome, (Exception, asyncio.CancelledError)):
+                    raise outcome
+                # The row itself may be what failed, so the fallback must not read its test case
+                logger.error(f"Validation failed for row {index}: {outcome!r}")
+                results.append(self._get_default_validation_results())
+            else:
+                results.append(outcome)
+        return results
+
+    async def _validate_responses(self, batch: List[ValidationRow]) -> List[Dict[str, Any]]:
+        """Validate several responses, marshaling uncached rows into shared Deepseek prompts"""
+        analyses: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        pending: List[PendingRow] = []
+        
+        owned: Dict[str, asyncio.Future] = {}
+        joined = []
+        
+        # Key every row up front, so a malformed row fails before any future is registered
+        cache_keys = [self._validation_key(response, language, test_case) for response, language, test_case in batch]
+        
+        try:
+            # Serve rows from the per-row cache or an identical in-flight request before batching the rest
+            for index, (cache_key, row) in enumerate(zip(cache_keys, batch)):
+                cached_results = await self._get_cached_analysis(cache_key)
+                if cached_results is not None:
+                    logger.info(f"Using cached analysis results for row {index}")
+                    analyses[index] = cached_results
+                elif cache_key in self._inflight:
+                    joined.append((index, self._inflight[cache_key]))
+                else:
+                    future = asyncio.get_running_loop().create_future()
+                    owned[cache_key] = future
+                    self._inflight[cache_key] = future
+                    pending.append((index, cache_key, row))
+            
+            chunks = self._pack_batches(pending)
+            chunk_analyses = await asyncio.gather(
+                *(self._get_batched_analysis_async([row for _, _, row in chunk]) for chunk in chunks)
+            )
+            
+            for chunk, chunk_results in zip(chunks, chunk_analyses):
+                for (index, cache_key, _), analysis in zip(chunk, chunk_results):
+                    analyses[index] = analysis
+                    owned[cache_key].set_result(analysis)
+        finally:
+            for cache_key, future in owned.items():
+                self._inflight.pop(cache_key, None)
+                if not future.done():
+                    future.cancel()
+        
+        for index, future in joined:
+            analyses[index] = await self._join_inflight(future)
+            if analyses[index] is None:
+                # The owning request was cancelled, so validate this row on its own
+                response, language, test_case = batch[index]
+                analyses[index] = await self._get_deepseek_analysis_async(
+                    self._create_validation_prompt(response, test_case["queries"][language]["validation"], language),
+                    self._validation_key(response, language, test_case)
+                )
+        
+        results: List[Dict[str, Any]] = []
+        for (response, language, test_case), row_analysis in zip(batch, analyses):
+            if row_analysis is None:
+                row_analysis = self._get_default_scores()
+            row_results = self._build_validation_results(row_analysis, response, language, test_case)
+            logger.info(f"Deepseek validation results for {test_case['id']}: {row_results}")
+            results.append(row_results)
+        return results
+
+    def _pack_batches(self, pending: List[PendingRow]) -> List[List[PendingRow]]:
+        """Group rows into batches bounded by marshal_batch_size and max_prompt_tokens"""
+        budget = self.max_prompt_tokens - self._tokens(self.system_prompt)
+        chunks: List[List[PendingRow]] = []
+        chunk: List[PendingRow] = []
+        chunk_tokens = 0
+        
+        for item in pending:
+            response = item[2][0]
+            row_tokens = self._tokens(response) + BATCHED_ROW_OVERHEAD_TOKENS
+            
+            if chunk and (len(chunk) >= self.marshal_batch_size or chunk_tokens + row_tokens > budget):
+                chunks.append(chunk)
+                chunk = []
+                chunk_tokens = 0
+            chunk.append(item)
+            chunk_tokens += row_tokens
+        
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _build_validation_results(self, analysis: Dict[str, Any], response: str, language: str,
+                                  test_case: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge Deepseek's subjective scores with the locally checked ones"""
+        query = test_case["queries"][language]
+        local_scores = {
+            "hallucination": check_hallucination(response, query["expected_contains"]),
+            "formatting": check_formatting(response),
+            "completeness": check_completeness(response, query["validation"])
         }
+        results: Dict[str, Any] = {}
+        for k in VALIDATION_KEYS:
+            if k not in SUBJECTIVE_KEYS:
+                score = local_scores[k]
+            elif k in local_scores:
+                # Checked both ways: average the mechanical check with Deepseek's judgement
+                score = (local_scores[k] + float(analysis.get(k, {}).get("score", 0.0))) / 2
+            else:
+                score = float(analysis.get(k, {}).get("score", 0.0))
+            results[k] = {"score": score}
         
         # Add API log to results if available
         if 'api_log' in analysis:
             results['api_log'] = analysis['api_log']
         
-        logger.info(f"Deepseek validation results for {test_case['id']}: {results}")
         return results
 
-    def compare_responses(self, en_response: str, ar_response: str, test_case: Dict[str, Any]) -> Dict[str, Any]:
-        """Compare responses between English and Arabic using Deepseek"""
-        # Prepare prompt for comparison
-        prompt = self._create_comparison_prompt(en_response, ar_response, test_case)
+    async def _compare_responses(self, en_response: str, ar_response: str, test_case: Dict[str, Any],
+                                 en_scores: Optional[Dict[str, Any]] = None,
+                                 ar_scores: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Compare responses between English and Arabic on the worker loop"""
+        # Use the caller's or cached validation scores; never spend extra requests to get them
+        en_validation = en_scores if en_scores is not None else await self._get_cached_validation(en_response, "en", test_case)
+        ar_validation = ar_scores if ar_scores is not None else await self._get_cached_validation(ar_response, "ar", test_case)
+        
+        # Prepare a compact prompt from the excerpts and scores rather than both full responses
+        prompt = self._create_comparison_prompt(en_response, ar_response, en_validation, ar_validation, test_case)
         
-        # Get Deepseek's analysis
-        analysis = self._get_deepseek_analysis(prompt)
+        # Get Deepseek's analysis; the key covers everything the prompt is built from
+        cache_key = self._key(en_response, {
+            "kind": "comparison",
+            "ar_response": ar_response,
+            "test_case_id": test_case['id'],
+            "excerpt_chars": self.comparison_excerpt_chars,
+            "en_scores": self._format_scores(en_validation),
+            "ar_scores": self._format_scores(ar_validation)
+        })
+        analysis = await self._get_deepseek_analysis_async(prompt, cache_key)
         
         # Process and structure the results
-        results = {
-            "semantic_similarity": self._extract_semantic_similarity_score(analysis),
-            "information_consistency": self._extract_information_consistency_score(analysis),
-            "structure_similarity": self._extract_structure_similarity_score(analysis)
-        }
+        results = {k: {"score": float(analysis.get(k, {}).get("score", 0.0))} for k in COMPARISON_KEYS}
         
         logger.info(f"Deepseek comparison results for {test_case['id']}: {results}")
         return results
 
-    def _create_validation_prompt(self, response: str, validation_criteria: Dict[str, Any], 
-                                expected_contains: list, language: str) -> str:
-        """Create a prompt for Deepseek to validate a single response"""
-        return f"""Please analyze the following response in {language} and provide scores for different aspects:
-
-Response: {response}
-
-Validation Criteria:
-- Expected tone: {validation_criteria.get('expected_tone', 'friendly')}
-- Required keywords: {validation_criteria.get('required_keywords', [])}
-- Expected content: {expected_contains}
-- Min length: {validation_criteria.get('min_length', 0)}
-- Max length: {validation_criteria.get('max_length', 1000)}
-
-Please provide scores (0-1) and brief explanations for:
-1. Clarity: How clear and well-structured is the response?
-2. Hallucination: Does the response contain the expected content without adding false information?
-3. Formatting: Is the response properly formatted with correct capitalization and punctuation?
-4. Completeness: Does the response meet length requirements and include required keywords?
-5. Language-specific requirements: Does the response follow language-specific patterns and requirements?
-
-Format your response as a JSON object with these exact keys:
-{{
-    "clarity": {{
-        "score": <score>,
-        "explanation": "<brief explanation>"
-    }},
-    "hallucination": {{
-        "score": <score>,
-        "explanation": "<brief explanation>"
-    }},
-    "formatting": {{
-        "score": <score>,
-        "explanation": "<brief explanation>"
-    }},
-    "completeness": {{
-        "score": <score>,
-        "explanation": "<brief explanation>"
-    }},
-    "language_specific": {{
-        "score": <score>,
-        "explanation": "<brief explanation>"
-    }}
-}}"""
-
-    def _create_comparison_prompt(self, en_response: str, ar_response: str, test_case: Dict[str, Any]) -> str:
+    async def _get_cached_validation(self, response: str, language: str,
+                                     test_case: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Validation results for a response whose subjective analysis is already cached, else None"""
+        analysis = await self._get_cached_analysis(self._validation_key(response, language, test_case))
+        if analysis is None:
+            return None
+        return self._build_validation_results(analysis, response, language, test_case)
+
+    def _create_validation_prompt(self, response: str, validation_criteria: Dict[str, Any], language: str) -> str:
+        """Create a prompt for Deepseek to score the subjective aspects of a single response"""
+        return VALIDATION_PROMPT_TEMPLATE.format_map({
+            "language": language,
+            "response": response,
+            "expected_tone": validation_criteria.get('expected_tone', 'friendly')
+        })
+
+    def _create_comparison_prompt(self, en_response: str, ar_response: str, en_scores: Optional[Dict[str, Any]],
+                                  ar_scores: Optional[Dict[str, Any]], test_case: Dict[str, Any]) -> str:
         """Create a prompt for Deepseek to compare responses between languages"""
-        return f"""Please compare the following English and Arabic responses and analyze their cross-language consistency:
-
-English Response: {en_response}
-Arabic Response: {ar_response}
-
-Test Case ID: {test_case['id']}
-
-Please analyze and provide scores (0-1) for:
-1. Semantic similarity: How well do the responses convey the same meaning and intent across languages?
-2. Information consistency: Are the key points, facts, and details consistent between both language versions?
-3. Structure similarity: How similar is the organization, flow, and presentation of information?
-
-For each aspect, consider:
-- Semantic similarity: Meaning preservation, intent matching, and cultural appropriateness
-- Information consistency: Factual accuracy, detail matching, and completeness
-- Structure similarity: Organization, formatting, and presentation style
-
-Format your response as a JSON object with these exact keys:
-{{
-    "semantic_similarity": {{
-        "score": <score>,
-        "explanation": "<brief explanation>"
-    }},
-    "information_consistency": {{
-        "score": <score>,
-        "explanation": "<brief explanation>"
-    }},
-    "structure_similarity": {{
-        "score": <score>,
-        "explanation": "<brief explanation>"
-    }}
-}}"""
+        limit = self.comparison_excerpt_chars
+        return COMPARISON_PROMPT_TEMPLATE.format_map({
+            "test_case_id": test_case['id'],
+            "en_length": len(en_response),
+            "en_excerpt": en_response[:limit],
+            "en_scores": self._format_scores(en_scores),
+            "ar_length": len(ar_response),
+            "ar_excerpt": ar_response[:limit],
+            "ar_scores": self._format_scores(ar_scores)
+        })
+
+    def _format_scores(self, results: Optional[Dict[str, Any]]) -> str:
+        """Render validation scores compactly for the comparison prompt"""
+        if results is None:
+            return "not available"
+        return ", ".join(f"{k}={results[k]['score']:.2f}" for k in VALIDATION_KEYS)
+
+    def _create_batched_validation_prompt(self, rows: List[ValidationRow]) -> str:
+        """Create a prompt for Deepseek to validate several responses at once"""
+        blocks = []
+        for number, (response, language, test_case) in enumerate(rows, start=1):
+            validation_criteria = test_case["queries"][language]["validation"]
+            blocks.append(BATCHED_ROW_TEMPLATE.format_map({
+                "number": number,
+                "language": language,
+                "response": response,
+                "expected_tone": validation_criteria.get('expected_tone', 'friendly')
+            }))
+        
+        return BATCHED_VALIDATION_PROMPT_TEMPLATE.format_map({
+            "count": len(rows),
+            "rows": "\n\n".join(blocks)
+        })
 
-    def _get_deepseek_analysis(self, response: str, validation_criteria: dict = None) -> dict:
-        """Get analysis from Deepseek API with improved rate limit handling."""
+    async def _get_batched_analysis_async(self, rows: List[ValidationRow]) -> List[Dict[str, Any]]:
+        """Get one analysis per row from a single Deepseek request, caching each row separately."""
         try:
-            # Generate cache key
-            response_hash = hash(response + str(validation_criteria))
+            url = self.api_url
+            payload: Dict[str, Any] = {
+                "model": self.model,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": self.system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": self._create_batched_validation_prompt(rows)
+                    }
+                ],
+                "temperature": 0.3,
+                "max_tokens": self.max_output_tokens * len(rows)
+            }
             
-            # Check cache first
-            cached_results = self._get_cached_analysis(response_hash)
-            if cached_results:
-                logger.info("Using cached analysis results")
-                return cached_results
-
-            # Prepare the API request
-            url = "https://openrouter.ai/api/v1/chat/completions"
+            api_log = {
+                "request": {
+                    "url": url,
+                    "headers": {k: v for k, v in self.headers.items() if k != "Authorization"},
+                    "payload": payload
+                }
+            }
+            
+            response_data = await self._post_with_retries_async(url, payload)
+            if response_data is None:
+                return [self._get_default_scores() for _ in rows]
+            
+            validation_results = self._load_response_content(response_data, payload["max_tokens"])
+            if not isinstance(validation_results, list) or len(validation_results) != len(rows):
+                logger.error(f"Expected a JSON array of {len(rows)} results from batched validation")
+                return [self._get_default_scores() for _ in rows]
+            
+            analyses = []
+            for number, ((response, language, test_case), row_results) in enumerate(zip(rows, validation_results), start=1):
+                # One unusable row falls back on its own; only rows that parsed are cached
+                try:
+                    if not isinstance(row_results, dict):
+                        raise TypeError(f"expected an object, got {type(row_results).__name__}")
+                    analysis = self._extract_scores(row_results)
+                except (TypeError, ValueError) as e:
+                    logger.error(f"Unusable scores for batched row {number}: {str(e)}")
+                    analyses.append(self._get_default_scores())
+                    continue
+                analysis['api_log'] = api_log
+                
+                # Cache each row under the same key a single validation would use
+                await self._store_cached_analysis(
+                    self._validation_key(response, language, test_case),
+                    analysis
+                )
+                analyses.append(analysis)
+            return analyses
             
-            # Prepare the validation prompt
-            validation_prompt = self._prepare_validation_prompt(response, validation_criteria or {})
+        except Exception as e:
+            logger.error(f"Error in _get_batched_analysis_async: {str(e)}")
+            return [self._get_default_scores() for _ in rows]
+
+    async def _get_deepseek_analysis_async(self, validation_prompt: str, cache_key: str) -> Dict[str, Any]:
+        """Get analysis of a prepared prompt, sharing one request among identical concurrent callers."""
+        # Check cache first
+        cached_results = await self._get_cached_analysis(cache_key)
+        if cached_results is not None:
+            logger.info("Using cached analysis results")
+            return cached_results
+        
+        # Join an identical request that is already on the wire; take over if its owner gives up
+        inflight = self._inflight.get(cache_key)
+        while inflight is not None:
+            logger.info("Joining identical in-flight analysis request")
+            shared_results = await self._join_inflight(inflight)
+            if shared_results is not None:
+                return shared_results
+            inflight = self._inflight.get(cache_key)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            results = await self._request_analysis_async(validation_prompt, cache_key)
+            future.set_result(results)
+            return results
+        finally:
+            self._inflight.pop(cache_key, None)
+            if not future.done():
+                future.cancel()
+
+    async def _join_inflight(self, future: "asyncio.Future[Dict[str, Any]]") -> Optional[Dict[str, Any]]:
+        """Await another caller's request without cancelling it; None if that caller was cancelled."""
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Only swallow the owner's cancellation, never our own
+            if not future.cancelled():
+                raise
+            return None
+
+    async def _request_analysis_async(self, validation_prompt: str, cache_key: str) -> Dict[str, Any]:
+        """Get analysis of a prepared prompt from Deepseek API with improved rate limit handling."""
+        try:
+            # Prepare the API request
+            url = self.api_url
             
             # Prepare the request payload
-            payload = {
+            payload: Dict[str, Any] = {
                 "model": self.model,
                 "messages": [
                     {
@@ -207,7 +760,8 @@ Format your response as a JSON object with these exact keys:
                         "content": validation_prompt
                     }
                 ],
-                "temperature": 0.3
+                "temperature": 0.3,
+                "max_tokens": self.max_output_tokens
             }
             
             # Create a detailed log of the API interaction
@@ -219,199 +773,157 @@ Format your response as a JSON object with these exact keys:
                 }
             }
             
-            # Make the API request with improved retry logic
-            max_retries = 3
-            base_delay = 5
-            max_delay = 30
-            
-            for attempt in range(max_retries):
-                try:
-                    # Get next API key in rotation
-                    current_key = self._get_next_api_key()
-                    headers = {**self.headers, "Authorization": f"Bearer {current_key}"}
-                    
-                    response = requests.post(url, headers=headers, json=payload)
-                    
-                    if response.status_code == 200:
-                        # Cache successful response
-                        self.response_cache[response_hash] = {
-                            'timestamp': time.time(),
-                            'results': self._parse_api_response(response, api_log)
-                        }
-                        return self.response_cache[response_hash]['results']
-                    
-                    elif response.status_code == 429:  # Rate limit hit
-                        delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
-                        logger.warning(f"Rate limit hit, attempt {attempt + 1}/{max_retries}. Waiting {delay:.1f} seconds...")
-                        time.sleep(delay)
-                        continue
-                    
-                    else:
-                        logger.error(f"API request failed with status code {response.status_code}")
-                        return self._get_default_scores()
-                        
-                except Exception as e:
-                    logger.error(f"Error during API request: {str(e)}")
-                    if attempt == max_retries - 1:
-                        return self._get_default_scores()
-                    delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
-                    time.sleep(delay)
+            response_data = await self._post_with_retries_async(url, payload)
+            if response_data is None:
+                return self._get_default_scores()
+
+            results = self._parse_api_response(response_data, api_log, payload["max_tokens"])
             
-            logger.error("All retry attempts failed")
-            return self._get_default_scores()
+            # Cache successful response; parse failures come back without an api_log
+            if 'api_log' in results:
+                await self._store_cached_analysis(cache_key, results)
+            return results
             
         except Exception as e:
-            logger.error(f"Error in _get_deepseek_analysis: {str(e)}")
+            logger.error(f"Error in _request_analysis_async: {str(e)}")
             return self._get_default_scores()
 
-    def _parse_api_response(self, response: requests.Response, api_log: dict) -> dict:
+    async def _post_with_retries_async(self, url: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Post a chat completion request, returning the decoded body or None on failure."""
+        session = self._get_session()
+        sem = self._get_semaphore()
+        
+        # Serialize once for every attempt
+        body = orjson.dumps(payload)
+        estimated_tokens = self._estimate_request_tokens(payload)
+        
+        # Make the API request with improved retry logic
+        max_retries = self.max_retries
+        base_delay = 5
+        max_delay = self.max_retry_wait
+        
+        for attempt in range(max_retries):
+            try:
+                # Pick the least-loaded key and wait for its capacity instead of waiting for a 429
+                key_entry = await self.key_scheduler.acquire(estimated_tokens)
+                
+                # The session already carries the other headers
+                headers = {"Authorization": f"Bearer {key_entry['key']}"}
+                
+                async with sem:
+                    async with session.post(url, data=body, headers=headers,
+                                            timeout=self.request_timeout) as r:
+                        retry_after = self.key_scheduler.update_from_headers(key_entry, r.headers)
+                        if r.status == 200:
+                            return orjson.loads(await r.read())
+                        status = r.status
+                
+                if status == 429:  # Rate limit hit
+                    logger.warning(f"Rate limit hit, attempt {attempt + 1}/{max_retries}")
+                    if retry_after is not None and retry_after > max_delay:
+                        # Waiting out a quota-style Retry-After would stall the whole run
+                        logger.error(f"Provider asked to wait {retry_after:.0f} seconds, more than {max_delay} allowed")
+                        return None
+                    if attempt == max_retries - 1:
+                        break
+                    if retry_after is None:
+                        # No Retry-After header, so rest this key for one refill interval
+                        self.key_scheduler.throttle(key_entry, 60.0 / key_entry["limiter"].max_requests_per_minute)
+                    continue
+                
+                if status in RETRYABLE_STATUS_CODES and attempt < max_retries - 1:
+                    # Transient server error; the limiter already honours any Retry-After
+                    delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
+                    logger.warning(f"Server error {status}, attempt {attempt + 1}/{max_retries}. Waiting {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
+                    continue
+                
+                logger.error(f"API request failed with status code {status}")
+                return None
+                    
+            except Exception as e:
+                logger.error(f"Error during API request: {str(e)}")
+                if attempt == max_retries - 1:
+                    return None
+                delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
+                await asyncio.sleep(delay)
+        
+        logger.error("All retry attempts failed")
+        return None
+
+    def _parse_api_response(self, response_data: Dict[str, Any], api_log: Dict[str, Any],
+                            max_tokens: int) -> Dict[str, Any]:
         """Parse the API response and extract scores."""
-        response_data = response.json()
+        validation_results = self._load_response_content(response_data, max_tokens)
+        if validation_results is None:
+            return self._get_default_scores()
+        
+        results = self._extract_scores(validation_results)
+        
+        # Add API log to results
+        results['api_log'] = api_log
+        
+        # Log the extracted scores for debugging
+        logger.debug(f"Extracted scores: {results}")
         
+        return results
+
+    def _load_response_content(self, response_data: Dict[str, Any], max_tokens: int) -> Any:
+        """Decode the JSON document returned in the first choice, or None if it is unusable."""
         if 'choices' not in response_data or not response_data['choices']:
             logger.error("No choices found in API response")
-            return self._get_default_scores()
+            return None
             
         content = response_data['choices'][0]['message']['content']
         
+        if response_data['choices'][0].get('finish_reason') == 'length':
+            logger.warning(f"API response was cut off at max_tokens={max_tokens}")
+        
         # Log the raw API response for debugging
         logger.debug(f"Raw API response content: {content}")
         
         # Remove markdown code block if present
-        if content.startswith('```json'):
-            content = content[7:]
-        if content.endswith('```'):
-            content = content[:-3]
+        content = CONTENT_FENCE.sub('', content)
         
         # Parse the inner JSON content
         try:
-            validation_results = json.loads(content.strip())
-            logger.debug(f"Parsed validation results: {validation_results}")
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response: {e}")
-            return self._get_default_scores()
+            validation_results = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            # Truncated or slightly malformed output often still holds usable scores
+            logger.warning(f"Failed to parse JSON response, attempting repair: {e}")
+            validation_results = json_repair.loads(content)
+            if not isinstance(validation_results, (dict, list)) or not validation_results:
+                logger.error("Could not repair JSON response")
+                return None
         
+        logger.debug(f"Parsed validation results: {validation_results}")
+        return validation_results
+
+    def _extract_scores(self, validation_results: Any) -> Dict[str, Any]:
+        """Map the scores in a decoded API result onto our validation keys."""
         # Initialize default scores
-        results = {
-            'clarity': {'score': 0.0},
-            'hallucination': {'score': 0.0},
-            'formatting': {'score': 0.0},
-            'completeness': {'score': 0.0},
-            'language_specific': {'score': 0.0},
-            'semantic_similarity': {'score': 0.0},
-            'information_consistency': {'score': 0.0},
-            'structure_similarity': {'score': 0.0}
-        }
+        results: Dict[str, Any] = {k: {'score': 0.0} for k in VALIDATION_KEYS + COMPARISON_KEYS}
         
-        # Extract scores from validation results
+        # Extract scores from validation results, either nested under 'scores' or at the top level
         if isinstance(validation_results, dict):
-            # Handle scores object format
-            if 'scores' in validation_results:
-                scores = validation_results.get('scores', {})
-                logger.debug(f"Found scores object: {scores}")
+            scores = validation_results.get('scores', validation_results)
+            logger.debug(f"Processing scores from: {scores}")
+            if isinstance(scores, dict):
                 for api_key, score_data in scores.items():
-                    # Find matching pattern for the key
-                    for pattern, our_key in self.key_patterns.items():
-                        if pattern.match(api_key):
-                            logger.debug(f"Matched pattern {pattern.pattern} for key {api_key}")
-                            if isinstance(score_data, dict):
-                                results[our_key]['score'] = float(score_data.get('score', 0.0))
-                            else:
-                                results[our_key]['score'] = float(score_data)
-                            break
-            # Handle direct scores format
-            else:
-                logger.debug(f"Processing direct scores from: {validation_results}")
-                for api_key, score_data in validation_results.items():
-                    # Find matching pattern for the key
-                    for pattern, our_key in self.key_patterns.items():
-                        if pattern.match(api_key):
-                            logger.debug(f"Matched pattern {pattern.pattern} for key {api_key}")
-                            if isinstance(score_data, dict):
-                                results[our_key]['score'] = float(score_data.get('score', 0.0))
-                            else:
-                                results[our_key]['score'] = float(score_data)
-                            break
-                    
-                    # Handle comparison scores directly
-                    if api_key in ['semantic_similarity', 'information_consistency', 'structure_similarity']:
+                    normalized = api_key.lower().replace(' ', '_').replace('-', '_')
+                    our_key = SCORE_KEY_MAP.get(normalized)
+                    if our_key:
                         if isinstance(score_data, dict):
-                            results[api_key]['score'] = float(score_data.get('score', 0.0))
+                            results[our_key]['score'] = float(score_data.get('score', 0.0))
                         else:
-                            results[api_key]['score'] = float(score_data)
-        
-        # Add API log to results
-        results['api_log'] = api_log
-        
-        # Log the extracted scores for debugging
-        logger.debug(f"Extracted scores: {results}")
+                            results[our_key]['score'] = float(score_data)
         
         return results
 
-    def _extract_clarity_score(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract clarity score from Deepseek analysis"""
-        return {"score": analysis.get("clarity", {}).get("score", 0.0)}
-
-    def _extract_hallucination_score(self, analysis: Dict[str, Any], expected_contains: list) -> Dict[str, Any]:
-        """Extract hallucination score from Deepseek analysis"""
-        return {"score": analysis.get("hallucination", {}).get("score", 0.0)}
-
-    def _extract_formatting_score(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract formatting score from Deepseek analysis"""
-        return {"score": analysis.get("formatting", {}).get("score", 0.0)}
-
-    def _extract_completeness_score(self, analysis: Dict[str, Any], validation_criteria: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract completeness score from Deepseek analysis"""
-        return {"score": analysis.get("completeness", {}).get("score", 0.0)}
-
-    def _extract_language_specific_score(self, analysis: Dict[str, Any], language: str) -> Dict[str, Any]:
-        """Extract language-specific score from Deepseek analysis"""
-        return {"score": analysis.get("language_specific", {}).get("score", 0.0)}
-
-    def _extract_semantic_similarity_score(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract semantic similarity score from Deepseek analysis"""
-        return {"score": analysis.get("semantic_similarity", {}).get("score", 0.0)}
-
-    def _extract_information_consistency_score(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract information consistency score from Deepseek analysis"""
-        return {"score": analysis.get("information_consistency", {}).get("score", 0.0)}
-
-    def _extract_structure_similarity_score(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract structure similarity score from Deepseek analysis"""
-        return {"score": analysis.get("structure_similarity", {}).get("score", 0.0)}
-
-    def _prepare_validation_prompt(self, response: str, validation_criteria: dict) -> str:
-        """Prepare the validation prompt for the API."""
-        prompt = f"""Please analyze the following response in en and provide scores for different aspects:
-
-Response: {response}
-
-Validation Criteria:
-- Expected tone: {validation_criteria.get('expected_tone', 'informative')}
-- Required keywords: {validation_criteria.get('required_keywords', [])}
-- Expected content: {validation_criteria.get('expected_content', [])}
-- Min length: {validation_criteria.get('min_length', 20)}
-- Max length: {validation_criteria.get('max_length', 500)}
-
-Please provide scores (0-1) and brief explanations for:
-1. Clarity (sentence structure, tone, factual content)
-2. Hallucination (presence of expected content)
-3. Formatting (capitalization, punctuation)
-4. Completeness (length, required keywords)
-5. Language-specific requirements (script, patterns)
-
-Format your response as a JSON object with scores and explanations."""
-        return prompt
-
-    def _get_default_scores(self) -> dict:
+    def _get_default_scores(self) -> Dict[str, Any]:
         """Return default scores when validation fails."""
-        return {
-            'clarity': {'score': 0.4},
-            'hallucination': {'score': 0.5},
-            'formatting': {'score': 0.5},
-            'completeness': {'score': 0.7},
-            'language_specific': {'score': 0.3},
-            'semantic_similarity': {'score': 0.4},
-            'information_consistency': {'score': 0.5},
-            'structure_similarity': {'score': 0.5}
-        } 
\ No newline at end of file
+        return {k: dict(v) for k, v in DEFAULT_SCORES.items()}
+
+    def _get_default_validation_results(self) -> Dict[str, Any]:
+        """Return default validation results for a row that could not be validated at all."""
+        return {k: dict(DEFAULT_SCORES[k]) for k in VALIDATION_KEYS}
@@ -1,41 +1,129 @@
+import asyncio
+import random
 import time
 from functools import wraps
+from typing import Optional, Tuple, Type
 from loguru import logger
 
-def retry_with_timeout(func, max_attempts=3, timeout=30, delay=1):
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Read an HTTP Retry-After delay (in seconds) from an exception or its response, if any"""
+    # aiohttp.ClientResponseError carries the headers itself; requests errors carry a response
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _check_attempts(max_attempts: int) -> None:
+    """Reject attempt counts that would never call the function"""
+    if max_attempts < 1:
+        raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+
+def _next_delay(error: BaseException, attempt: int, base: float, max_delay: float, jitter: bool) -> float:
+    """Delay before the next attempt: Retry-After if the server sent one, else jittered exponential backoff"""
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return retry_after
+
+    delay = min(base * (2 ** attempt), max_delay)
+    if jitter:
+        delay += random.uniform(0, delay * 0.5)
+    return delay
+
+def retry(max_attempts: int = 3, timeout: float = 30, base: float = 1, max_delay: float = 10,
+          jitter: bool = True, retry_on: Tuple[Type[BaseException], ...] = (Exception,), reraise: bool = True):
     """
-    Retry a function with timeout and exponential backoff.
-    
+    Decorator retrying a function with timeout and exponential backoff.
+
     Args:
-        func: The function to retry
         max_attempts: Maximum number of attempts
         timeout: Total timeout in seconds
-        delay: Initial delay between attempts in seconds
-    
+        base: Initial delay between attempts in seconds
+        max_delay: Cap on the backoff delay in seconds
+        jitter: Add up to 50% random jitter to each backoff delay
+        retry_on: Exception types that trigger a retry
+        reraise: Re-raise the last error once attempts are exhausted, otherwise return None
+
     Returns:
-        The result of the function if successful
+        The decorated function, returning the first result that does not raise
+    """
+    _check_attempts(max_attempts)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start_time = time.monotonic()
+            last_error = None
+
+            for attempt in range(max_attempts):
+                try:
+                    return func(*args, **kwargs)
+                except retry_on as e:
+                    last_error = e
+                    logger.warning(f"Attempt {attempt + 1}/{max_attempts} failed: {str(e)}")
+
+                if attempt == max_attempts - 1:
+                    break
+
+                next_delay = _next_delay(last_error, attempt, base, max_delay, jitter)
+                if time.monotonic() - start_time + next_delay > timeout:
+                    logger.error(f"Timeout of {timeout} seconds would be exceeded")
+                    break
+
+                logger.info(f"Retrying in {next_delay:.1f} seconds...")
+                time.sleep(next_delay)
+
+            logger.error(f"Failed after {attempt + 1} attempts")
+            if reraise:
+                raise last_error
+            return None
+        return wrapper
+    return decorator
+
+def aretry(max_attempts: int = 3, timeout: float = 30, base: float = 1, max_delay: float = 10,
+           jitter: bool = True, retry_on: Tuple[Type[BaseException], ...] = (Exception,), reraise: bool = True):
+    """Async counterpart of retry() for coroutine functions; waits with asyncio.sleep"""
+    _check_attempts(max_attempts)
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start_time = time.monotonic()
+            last_error = None
+
+            for attempt in range(max_attempts):
+                try:
+                    return await func(*args, **kwargs)
+                except retry_on as e:
+                    last_error = e
+                    logger.warning(f"Attempt {attempt + 1}/{max_attempts} failed: {str(e)}")
+
+                if attempt == max_attempts - 1:
+                    break
+
+                next_delay = _next_delay(last_error, attempt, base, max_delay, jitter)
+                if time.monotonic() - start_time + next_delay > timeout:
+                    logger.error(f"Timeout of {timeout} seconds would be exceeded")
+                    break
+
+                logger.info(f"Retrying in {next_delay:.1f} seconds...")
+                await asyncio.sleep(next_delay)
+
+            logger.error(f"Failed after {attempt + 1} attempts")
+            if reraise:
+                raise last_error
+            return None
+        return wrapper
+    return decorator
+
+def retry_with_timeout(func, max_attempts=3, timeout=30, delay=1):
+    """
+    Call a zero-argument function with retry(); kept for existing callers.
+
+    Unlike before, the function's result is returned even when falsy and the
+    last error is raised once attempts are exhausted.
     """
-    start_time = time.time()
-    attempt = 0
-    
-    while attempt < max_attempts:
-        try:
-            result = func()
-            if result:
-                return result
-        except Exception as e:
-            logger.warning(f"Attempt {attempt + 1}/{max_attempts} failed: {str(e)}")
-        
-        # Check if we've exceeded the total timeout
-        if time.time() - start_time > timeout:
-            logger.error(f"Timeout exceeded after {timeout} seconds")
-            return False
-        
-        # Calculate next delay with exponential backoff
-        next_delay = min(delay * (2 ** attempt), 10)  # Cap at 10 seconds
-        logger.info(f"Retrying in {next_delay:.1f} seconds...")
-        time.sleep(next_delay)
-        attempt += 1
-    
-    logger.error(f"Failed after {max_attempts} attempts")
-    return False 
\ No newline at end of file
+    return retry(max_attempts=max_attempts, timeout=timeout, base=delay)(func)()